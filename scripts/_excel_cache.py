@@ -0,0 +1,109 @@
+# scripts/_excel_cache.py
+# Loading the ACI workbook for all the builders/runners, in two cache layers:
+#   - a parquet sidecar (data/.cache/aci_<key>.parquet) so the xlsx is only
+#     decoded when it changes; a parquet read is near-free next to openpyxl
+#   - an in-process memo so one CLI run reads it at most once
+# Both are keyed by the file's (mtime_ns, size): editing the workbook invalidates them.
+
+import os
+import hashlib
+import warnings
+from functools import lru_cache
+
+import pandas as pd
+
+EXCEL_SHEET = "Working Global"
+
+
+def _open_workbook(excel_path: str) -> pd.ExcelFile:
+    """
+    openpyxl is the reference reader (requirements.txt), in read-only/data-only
+    mode, which streams rows instead of building the full cell DOM, and skips
+    loading external-link parts it never uses. python-calamine is optional: a
+    faster native reader used when installed (not installed by default).
+    """
+    try:
+        return pd.ExcelFile(excel_path, engine="calamine")
+    except ImportError:
+        # openpyxl silently falls back to the pure-Python xml.etree parser
+        # (many times slower and heavier) when lxml is missing
+        from openpyxl.xml import LXML
+        if not LXML:
+            warnings.warn("lxml not installed: openpyxl will parse the ACI workbook "
+                          "with xml.etree (slow); pip install lxml", stacklevel=2)
+        return pd.ExcelFile(
+            excel_path,
+            engine="openpyxl",
+            engine_kwargs={"read_only": True, "data_only": True, "keep_links": False},
+        )
+
+
+def _resolve_sheet_name(xl: pd.ExcelFile, desired: str) -> str:
+    want = (desired or "").strip().lower()
+    for s in xl.sheet_names:
+        if (s or "").strip().lower() == want:
+            return s
+    raise ValueError(f"Worksheet named '{desired}' not found. Available sheets: {xl.sheet_names}")
+
+
+def _parquet_cache_path(excel_path: str) -> str:
+    """data/.cache/aci_<key>.parquet, key = md5 of the xlsx (mtime_ns, size) and the sheet."""
+    st = os.stat(excel_path)
+    key = hashlib.md5(f"{st.st_mtime_ns}:{st.st_size}:{EXCEL_SHEET}".encode()).hexdigest()[:12]
+    cache_dir = os.path.join(os.path.dirname(excel_path) or ".", ".cache")
+    return os.path.join(cache_dir, f"aci_{key}.parquet")
+
+
+def _read_aci_excel(excel_path: str) -> pd.DataFrame:
+    """
+    Cleaned (rank, country, iata, total_passengers) frame from the xlsx.
+    The result is cached as parquet next to the workbook and reused until the
+    xlsx changes.
+    """
+    cache_path = _parquet_cache_path(excel_path)
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception:
+            pass
+
+    # One workbook handle for both the sheet lookup and the read
+    with _open_workbook(excel_path) as xl:
+        sheet = _resolve_sheet_name(xl, EXCEL_SHEET)
+        df = xl.parse(
+            sheet_name=sheet,
+            header=2,
+            usecols="A,C,F,M",
+        )
+
+    df.columns = ["rank", "country", "iata", "total_passengers"]
+
+    df["country"] = df["country"].astype(str).str.strip()
+    df["iata"] = df["iata"].astype(str).str.strip().str.upper()
+    df["total_passengers"] = pd.to_numeric(df["total_passengers"], errors="coerce")
+
+    df = df.dropna(subset=["iata", "country", "total_passengers"]).copy()
+    df = df[df["iata"].astype(str).str.len().between(2, 4)].copy()
+    df = df.drop_duplicates(subset=["iata"], keep="first").reset_index(drop=True)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        df.to_parquet(cache_path, compression="zstd")
+    except Exception:
+        pass  # cache is best-effort
+    return df
+
+
+@lru_cache(maxsize=1)
+def _load_aci_cached(excel_path: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    return _read_aci_excel(excel_path)
+
+
+def load_aci(excel_path: str) -> pd.DataFrame:
+    """
+    Cleaned (rank, country, iata, total_passengers) frame for excel_path.
+    The same object is returned on every call while the file is unchanged;
+    treat it as read-only.
+    """
+    st = os.stat(excel_path)
+    return _load_aci_cached(excel_path, st.st_mtime_ns, st.st_size)
@@ -0,0 +1,154 @@
+# scripts/aca_source.py
+# The ACA accredited-airports page, shared by build_grid / build_aca_table /
+# build_map: one cached download (conditional GET, see cached_get) instead of
+# three full fetches per run, plus the lxml table helpers all three parse it with
+# and the __TOKEN__ filler for their inline page templates.
+
+import json
+import os
+import re
+import shutil
+import threading
+from collections import defaultdict
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+ACA_URL = "https://www.airportcarbonaccreditation.org/accredited-airports/"
+
+# Downloaded bodies + their ETag/Last-Modified validators (not committed)
+CACHE_DIR = os.path.join("docs", ".cache")
+
+
+def _new_session() -> requests.Session:
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=2))
+    return s
+
+
+# One keep-alive connection pool shared by all downloads
+_SESSION = _new_session()
+
+# Threads asking for the same cache entry take turns: the second one then just
+# revalidates (304) instead of downloading the same body again in parallel.
+_LOCKS = defaultdict(threading.Lock)
+
+
+def _reset_after_fork() -> None:
+    # A forked child must not reuse the parent's pooled keep-alive sockets:
+    # two processes writing to one connection interleave requests/responses.
+    # The inherited session is abandoned, not closed, so the parent's
+    # connections are left untouched. Locks held by parent threads are reset too.
+    global _SESSION, _LOCKS
+    _SESSION = _new_session()
+    _LOCKS = defaultdict(threading.Lock)
+
+
+if hasattr(os, "register_at_fork"):  # POSIX only; Windows never forks
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def cached_get(url: str, cache_path: str, headers: dict | None = None, timeout: int = 45) -> tuple[str, dict]:
+    """
+    Conditional GET with an on-disk cache. The body is streamed to
+    cache_path + ".body" and the validators kept in cache_path + ".meta.json";
+    when the server answers 304 the cached body is reused as-is.
+    Both files are replaced atomically, so concurrent builders (threads or
+    worker processes) never read a half-written body.
+    Returns (body_path, meta).
+    """
+    body_path = cache_path + ".body"
+    meta_path = cache_path + ".meta.json"
+    part = f".{os.getpid()}.{threading.get_ident()}.part"
+
+    with _LOCKS[cache_path]:
+        meta = {}
+        if os.path.exists(body_path):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+
+        hdrs = dict(headers or {})
+        if meta.get("etag"):
+            hdrs["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            hdrs["If-Modified-Since"] = meta["last_modified"]
+
+        with _SESSION.get(url, headers=hdrs, timeout=timeout, stream=True) as r:
+            if r.status_code == 304 and meta:
+                return body_path, meta
+            r.raise_for_status()
+
+            os.makedirs(os.path.dirname(body_path) or ".", exist_ok=True)
+            r.raw.decode_content = True  # undo gzip/deflate transfer encoding
+            with open(body_path + part, "wb") as f:
+                shutil.copyfileobj(r.raw, f)
+            os.replace(body_path + part, body_path)
+
+            meta = {
+                "url": url,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "encoding": r.encoding,
+            }
+        with open(meta_path + part, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + part, meta_path)
+        return body_path, meta
+
+
+def fetch_aca_html(timeout: int = 45) -> str:
+    headers = {
+        "User-Agent": "Mozilla/5.0 (compatible; ACA-Dashboard-Bot/1.0)",
+        "Accept": "text/html,application/xhtml+xml",
+    }
+    path, meta = cached_get(ACA_URL, os.path.join(CACHE_DIR, "aca"), headers=headers, timeout=timeout)
+    with open(path, "rb") as f:
+        return f.read().decode(meta.get("encoding") or "utf-8", errors="replace")
+
+
+# ---------- page templates ----------
+# __TOKEN__ placeholders in the builders' inline HTML/JS templates. Kept instead
+# of str.format so the JS/CSS braces don't all need doubling.
+_TOKEN_RE = re.compile(r"__([A-Z][A-Z0-9_]*?)__")
+
+
+def _fill_tokens(template: str, values: dict) -> str:
+    """Substitute every __TOKEN__ in one pass; unknown tokens are left as-is."""
+    return _TOKEN_RE.sub(lambda mt: str(values.get(mt.group(1), mt.group(0))), template)
+
+
+# ---------- lxml helpers ----------
+def _class_xpath(cls: str) -> str:
+    # XPath equivalent of the CSS ".cls" selector
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+def _cell_text(el) -> str | None:
+    # Same whitespace handling as pd.read_html: collapse runs, strip, "" -> NaN
+    txt = " ".join(el.text_content().split())
+    return txt or None
+
+
+def _table_header(table) -> list[str]:
+    ths = table.xpath("./thead/tr[1]/*[self::th or self::td]")
+    if not ths:
+        ths = table.xpath("(./tbody/tr | ./tr)[1]/th")
+    return [_cell_text(th) or "" for th in ths]
+
+
+def _table_frame(table) -> pd.DataFrame:
+    """Header + body rows of one lxml <table>, handed to pandas in one shot."""
+    hdr = _table_header(table)
+    rows = []
+    for tr in table.xpath("./tbody/tr | ./tr"):
+        cells = tr.xpath("./td")
+        if not cells:
+            continue  # header row living in the body
+        row = [_cell_text(td) for td in cells[:len(hdr)]]
+        row += [None] * (len(hdr) - len(row))
+        rows.append(row)
+    return pd.DataFrame(rows, columns=hdr)
@@ -1,55 +1,38 @@
 # scripts/build_aca_table.py
-import io
 import os
 import json
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
+import lxml.html
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+
+from aca_source import fetch_aca_html, _class_xpath, _fill_tokens, _table_header, _table_frame
 
 LEVELS_DESC = ['Level 5', 'Level 4+', 'Level 4',
                'Level 3+', 'Level 3', 'Level 2', 'Level 1']
 GRID_DEFAULT_PATH = os.path.join("docs", "grid.html")
 
 
-def fetch_aca_html(timeout: int = 45) -> str:
-    url = "https://www.airportcarbonaccreditation.org/accredited-airports/"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; ACA-Table-Bot/1.0)",
-        "Accept": "text/html,application/xhtml+xml",
-    }
-    r = requests.get(url, headers=headers, timeout=timeout)
-    r.raise_for_status()
-    return r.text
+def parse_aca_table(html: str) -> pd.DataFrame:
+    tree = lxml.html.fromstring(html)
 
+    # ".airports-listview table", straight from the lxml tree (no re-serialize + read_html)
+    tables = tree.xpath(f"//*[{_class_xpath('airports-listview')}]//table")
+    target = tables[0] if tables else None
 
-def parse_aca_table(html: str) -> pd.DataFrame:
-    soup = BeautifulSoup(html, "lxml")
-    dfs: List[pd.DataFrame] = []
-
-    table = soup.select_one(".airports-listview table")
-    if table is not None:
-        try:
-            dfs = pd.read_html(io.StringIO(str(table)))
-        except Exception:
-            dfs = []
-
-    if not dfs:
-        all_tables = pd.read_html(html)
-        target = None
+    if target is None:
+        # Any table whose header carries the ACA columns; headers only, no DataFrames
         want = {"airport", "airport code", "country", "region", "level"}
-        for df in all_tables:
-            cols = {str(c).strip().lower() for c in df.columns}
+        for table in tree.iter("table"):
+            cols = {h.strip().lower() for h in _table_header(table)}
             if want.issubset(cols):
-                target = df
+                target = table
                 break
         if target is None:
             raise RuntimeError("ACA table not found on the page.")
-        dfs = [target]
 
-    raw = dfs[0]
+    raw = _table_frame(target)
     aca = raw.rename(
         columns={
             "Airport": "airport",
@@ -68,8 +51,9 @@ def parse_aca_table(html: str) -> pd.DataFrame:
         return r
 
     aca["region4"] = aca["region"].map(region4)
-    aca = aca.dropna(subset=["iata", "aca_level", "region4"]).copy()
-    aca["iata"] = aca["iata"].astype(str).str.upper()
+    aca = aca.dropna(subset=["iata", "aca_level", "region4"]).assign(
+        iata=lambda d: d["iata"].str.upper()
+    )
     return aca
 
 
@@ -91,9 +75,15 @@ def make_payload(df: pd.DataFrame) -> dict:
 
 
 # --- Competitors (Passengers & Share ONLY; Growth excluded) ---
+def _first(el, cls: str):
+    # lxml stand-in for el.select_one(".cls")
+    found = el.xpath(f".//*[{_class_xpath(cls)}]")
+    return found[0] if found else None
+
+
 def _parse_grid_competitors_from_html(grid_html: str) -> Dict[str, List[str]]:
-    soup = BeautifulSoup(grid_html, "lxml")
-    rows = soup.select(".container .row")
+    tree = lxml.html.fromstring(grid_html)
+    rows = tree.xpath(f"//*[{_class_xpath('container')}]//*[{_class_xpath('row')}]")
 
     def _cat_from_label(txt: str) -> Optional[str]:
         t = " ".join((txt or "").strip().lower().split())
@@ -111,14 +101,14 @@ def _parse_grid_competitors_from_html(grid_html: str) -> Dict[str, List[str]]:
     allowed = {"Share", "Passengers"}
 
     for row in rows:
-        grid_el = row.select_one(".grid")
-        if not grid_el:
+        grid_el = _first(row, "grid")
+        if grid_el is None:
             continue
 
         # Old layout: .cat exists and we infer category from its label.
-        cat_el = row.select_one(".cat")
+        cat_el = _first(row, "cat")
         if cat_el is not None:
-            cat = _cat_from_label(cat_el.get_text())
+            cat = _cat_from_label(cat_el.text_content())
         else:
             # New layout: no .cat at all, everything is throughput,
             # so treat as "Passengers" by default.
@@ -127,15 +117,15 @@ def _parse_grid_competitors_from_html(grid_html: str) -> Dict[str, List[str]]:
         if not cat or cat not in allowed:
             continue
 
-        chips = grid_el.select(".chip")
+        chips = grid_el.xpath(f".//*[{_class_xpath('chip')}]")
         for chip in chips:
-            classes = chip.get("class", [])
+            classes = (chip.get("class") or "").split()
             if "origin" in classes:
                 continue
-            code_el = chip.select_one(".code")
-            if not code_el:
+            code_el = _first(chip, "code")
+            if code_el is None:
                 continue
-            iata = code_el.get_text(strip=True).upper()
+            iata = "".join(code_el.text_content().split()).upper()
             if iata and len(iata) <= 4:
                 comp.setdefault(iata, [])
                 if cat not in comp[iata]:
@@ -362,13 +352,12 @@ def build_aca_table_html(
 </script>
 """
 
-    page = (
-        template
-        .replace("__UPDATED__", updated)
-        .replace("__DATA_JSON__", data_json)
-        .replace("__COMP_JSON__", competitors_json)
-        .replace("__TARGET__", target_iata)
-        .replace("__DEFAULT_REGION__", default_region)
-    )
+    page = _fill_tokens(template, {
+        "UPDATED": updated,
+        "DATA_JSON": data_json,
+        "COMP_JSON": competitors_json,
+        "TARGET": target_iata,
+        "DEFAULT_REGION": default_region,
+    })
 
     return page, df
@@ -8,13 +8,12 @@
 #   2) International (out-of-region) peers
 # Exposes build_grid(...). Also runnable as a script to write docs/grid.html.
 
-import os, re, argparse, io
-import numpy as np  # kept in case you later extend logic
+import os, re, argparse
+import lxml.html
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 
-EXCEL_SHEET = "Working Global"
+from _excel_cache import load_aci
+from aca_source import fetch_aca_html, _class_xpath, _table_header, _table_frame
 
 IN_REGION_N = 10
 OUT_REGION_N = 5
@@ -117,24 +116,6 @@ def _dev(val, target):
     diff_pct = (float(val) - float(target)) / float(target) * 100.0
     return _fmt_pct(diff_pct, signed=True, decimals=1)
 
-def _resolve_sheet_name(excel_path: str, desired: str) -> str:
-    xl = pd.ExcelFile(excel_path)
-    want = (desired or "").strip().lower()
-    for s in xl.sheet_names:
-        if (s or "").strip().lower() == want:
-            return s
-    raise ValueError(f"Worksheet named '{desired}' not found. Available sheets: {xl.sheet_names}")
-
-def fetch_aca_html(timeout: int = 45) -> str:
-    url = "https://www.airportcarbonaccreditation.org/accredited-airports/"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; ACA-Grid-Bot/1.0)",
-        "Accept": "text/html,application/xhtml+xml",
-    }
-    r = requests.get(url, headers=headers, timeout=timeout)
-    r.raise_for_status()
-    return r.text
-
 def parse_aca_regions(html: str) -> pd.DataFrame:
     """
     Return dataframe with columns: iata, region_group
@@ -145,30 +126,24 @@ def parse_aca_regions(html: str) -> pd.DataFrame:
       - Asia Pacific -> Asia Pacific
       - else -> Other
     """
-    soup = BeautifulSoup(html, "lxml")
-    dfs = []
-
-    table = soup.select_one(".airports-listview table")
-    if table is not None:
-        try:
-            dfs = pd.read_html(io.StringIO(str(table)))
-        except Exception:
-            dfs = []
-
-    if not dfs:
-        all_tables = pd.read_html(html)
-        target = None
+    tree = lxml.html.fromstring(html)
+
+    # ".airports-listview table", straight from the lxml tree (no re-serialize + read_html)
+    tables = tree.xpath(f"//*[{_class_xpath('airports-listview')}]//table")
+    target = tables[0] if tables else None
+
+    if target is None:
+        # Any table whose header carries the ACA columns; headers only, no DataFrames
         want = {"airport", "airport code", "country", "region", "level"}
-        for df in all_tables:
-            cols = {str(c).strip().lower() for c in df.columns}
+        for table in tree.iter("table"):
+            cols = {h.strip().lower() for h in _table_header(table)}
             if want.issubset(cols):
-                target = df
+                target = table
                 break
         if target is None:
             raise RuntimeError("ACA table not found on the page.")
-        dfs = [target]
 
-    raw = dfs[0]
+    raw = _table_frame(target)
     aca = raw.rename(
         columns={
             "Airport code": "iata",
@@ -176,8 +151,8 @@ def parse_aca_regions(html: str) -> pd.DataFrame:
         }
     )[["iata", "region"]].copy()
 
-    aca["iata"] = aca["iata"].astype(str).str.strip().str.upper()
-    aca["region"] = aca["region"].astype(str).str.strip()
+    aca["iata"] = aca["iata"].str.strip().str.upper()
+    aca["region"] = aca["region"].str.strip()
 
     def region_group(r: str) -> str:
         if r in ("North America", "Latin America & the Caribbean"):
@@ -218,9 +193,10 @@ def _fallback_region_from_country(country: str) -> str:
 
     return "Unknown"
 
-def _load_aci(excel_path: str) -> pd.DataFrame:
+def _load_aci(excel_path: str, df: pd.DataFrame | None = None) -> pd.DataFrame:
     """
-    Load ACI Excel from the 'Working Global' tab.
+    Load ACI Excel from the 'Working Global' tab (or use df, an already-loaded
+    load_aci frame, which is left unmodified).
 
     Headers are on Excel row 3, so we read with header=2 (0-indexed).
     We only rely on fixed columns:
@@ -229,24 +205,8 @@ def _load_aci(excel_path: str) -> pd.DataFrame:
       - Airport Code (IATA): F
       - Total Passengers: M
     """
-    sheet = _resolve_sheet_name(excel_path, EXCEL_SHEET)
-
-    df = pd.read_excel(
-        excel_path,
-        sheet_name=sheet,
-        header=2,
-        usecols="A,C,F,M",
-    ).copy()
-
-    df.columns = ["rank", "country", "iata", "total_passengers"]
-
-    df["country"] = df["country"].astype(str).str.strip()
-    df["iata"] = df["iata"].astype(str).str.strip().str.upper()
-    df["total_passengers"] = pd.to_numeric(df["total_passengers"], errors="coerce")
-
-    df = df.dropna(subset=["iata", "country", "total_passengers"]).copy()
-    df = df[df["iata"].astype(str).str.len().between(2, 4)].copy()
-    df = df.drop_duplicates(subset=["iata"], keep="first").reset_index(drop=True)
+    if df is None:
+        df = load_aci(excel_path)
 
     # Derive region_group from ACA by IATA
     try:
@@ -254,7 +214,7 @@ def _load_aci(excel_path: str) -> pd.DataFrame:
         aca_regions = parse_aca_regions(aca_html)
         df = df.merge(aca_regions, on="iata", how="left")
     except Exception:
-        df["region_group"] = None
+        df = df.assign(region_group=None)
 
     # Fallback for missing region_group
     df["region_group"] = df["region_group"].fillna("")
@@ -336,6 +296,7 @@ def build_grid(
     excel_path: str,
     iata: str,
     out_html: str | None = None,
+    df: pd.DataFrame | None = None,
 ):
     """
     Build a throughput-only similarity set for a target IATA.
@@ -343,8 +304,10 @@ def build_grid(
       - 10 peers in the target's region_group
       - 5 peers out of region
     Renders two sections: Regional peers and International peers.
+    df: optional pre-loaded ACI frame (see _excel_cache.load_aci) to skip
+    reading excel_path again.
     """
-    df = _load_aci(excel_path)
+    df = _load_aci(excel_path, df=df)
     if df[df["iata"] == iata].empty:
         raise ValueError(f"IATA '{iata}' not found in ACI file.")
 
@@ -411,11 +374,11 @@ def build_grid(
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--excel", default="data/Copy of ACI 2024 North America Traffic Report (1).xlsx")
-    ap.add_argument("--iata", required=True)
+    ap.add_argument("--iata", required=True, type=str.upper)
     ap.add_argument("--out", default="docs/grid.html")
     a = ap.parse_args()
 
-    res = build_grid(a.excel, a.iata.upper(), out_html=a.out)
+    res = build_grid(a.excel, a.iata, out_html=a.out)
 
     print("Nearest airports by throughput (excluding target):")
     print(", ".join(res["nearest"]))
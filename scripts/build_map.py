@@ -10,17 +10,25 @@
 #  - Do NOT restrict ACA data to Americas Only (international peers get correct ACA colors)
 #  - Initial view opens to target's region group (from docs/grid.html)
 
-import io
+import functools
+import gzip
+import hashlib
 import os
 import sys
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 import folium
+import lxml.html
+import minify_html
+import numpy as np
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+
+from aca_source import (
+    CACHE_DIR, cached_get, fetch_aca_html, _class_xpath, _fill_tokens, _table_header, _table_frame,
+)
 
 # ---------- config ----------
 LEVELS = ['Level 1', 'Level 2', 'Level 3', 'Level 3+',
@@ -46,6 +54,14 @@ LEVEL_BADGE = {
     "Level 5": "5",
 }
 
+# Levels plus the "Unknown" bucket, and per-level tuples indexed via LEVEL_INDEX
+# (one dict probe per row, then plain tuple indexing)
+LEVELS_ALL = LEVELS + ["Unknown"]
+LEVEL_INDEX = {lvl: i for i, lvl in enumerate(LEVELS_ALL)}
+UNKNOWN_INDEX = LEVEL_INDEX["Unknown"]
+PALETTE_T = tuple(PALETTE.get(lvl, "#666") for lvl in LEVELS_ALL)
+BADGE_T = tuple(LEVEL_BADGE.get(lvl, "") for lvl in LEVELS_ALL)
+
 RADIUS = {"large": 8, "medium": 7, "small": 6}
 STROKE = 2
 
@@ -80,6 +96,12 @@ OUT_FILE = os.path.join(OUT_DIR, "aca_map.html")
 # read target + composite list from the grid output
 GRID_DEFAULT_PATH = os.path.join("docs", "grid.html")
 
+# upstream sources
+COORDS_URL = "https://raw.githubusercontent.com/davidmegginson/ourairports-data/main/airports.csv"
+
+# sha256 of the inputs the last successful aca_map.html was built from
+MAP_HASH_FILE = os.path.join(CACHE_DIR, "aca_map.sha")
+
 # Region-group view presets (for initial map view)
 # These are intentionally broad, so they "feel right" for each group.
 REGION_GROUP_BOUNDS = {
@@ -90,6 +112,13 @@ REGION_GROUP_BOUNDS = {
 }
 
 
+# brotli is optional: the .br sibling is skipped without it (.gz is always written)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
 # ---------- helpers ----------
 def write_error_page(msg: str) -> None:
     os.makedirs(OUT_DIR, exist_ok=True)
@@ -107,49 +136,116 @@ h1{margin:0 0 10px 0}code{background:#f5f7fb;padding:2px 6px;border-radius:6px}<
   <p><strong>Status:</strong> temporarily unavailable.</p>
   <p><strong>Reason:</strong> __MSG__</p>
   <p>Last attempt: __UPDATED__. This page updates when the generator runs.</p>
-</div>""".replace("__MSG__", msg).replace("__UPDATED__", updated)
-    with open(OUT_FILE, "w", encoding="utf-8") as f:
-        f.write(html)
+</div>"""
+    html = _fill_tokens(html, {"MSG": msg, "UPDATED": updated})
+    # Goes through the same writer so a stale .gz/.br of the last good map isn't left behind
+    _write_precompressed(OUT_FILE, html.encode("utf-8"))
     print("Wrote fallback page:", OUT_FILE)
 
 
-def fetch_aca_html(timeout: int = 45) -> str:
-    url = "https://www.airportcarbonaccreditation.org/accredited-airports/"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; ACA-Map-Bot/1.0)",
-        "Accept": "text/html,application/xhtml+xml",
-    }
-    r = requests.get(url, headers=headers, timeout=timeout)
-    r.raise_for_status()
-    return r.text
+def _write_precompressed(path: str, data: bytes) -> None:
+    """Write data to path plus .gz (and .br when brotli is installed) siblings."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    with gzip.open(path + ".gz", "wb", compresslevel=9) as f:
+        f.write(data)
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, mode=brotli.MODE_TEXT, quality=11))
+
+
+def render_map_html(fmap: folium.Map) -> str:
+    """Render the map once and minify the inline HTML/CSS/JS."""
+    return minify_html.minify(
+        fmap.get_root().render(),
+        minify_js=True,
+        minify_css=True,
+        remove_processing_instructions=True,
+    )
+
+
+def write_map_html(fmap: folium.Map | str | bytes, path: str) -> str | bytes:
+    """
+    Write the minified map HTML to path, plus precompressed path + ".gz" / ".br"
+    siblings for static hosting. fmap may also be HTML already produced by
+    render_map_html (e.g. returned from a worker process), as str or as
+    UTF-8 bytes (written without re-encoding).
+    Returns the minified HTML (bytes if bytes were passed in).
+    """
+    if isinstance(fmap, bytes):
+        _write_precompressed(path, fmap)
+        return fmap
+    html = fmap if isinstance(fmap, str) else render_map_html(fmap)
+    _write_precompressed(path, html.encode("utf-8"))
+    return html
+
+
+def fetch_coords_csv(timeout: int = 45) -> str:
+    """Return the local path of the (cached) OurAirports CSV."""
+    path, _ = cached_get(COORDS_URL, os.path.join(CACHE_DIR, "airports_csv"), timeout=timeout)
+    return path
+
+
+def _load_aca(aca_html: str | None) -> pd.DataFrame:
+    """parse_aca_table, or an empty frame if the page is missing or unparseable."""
+    if aca_html is not None:
+        try:
+            return parse_aca_table(aca_html)
+        except Exception as e:
+            print("WARNING: ACA table not parsed, levels will show as N/A:", e, file=sys.stderr)
+    return pd.DataFrame(columns=["iata", "airport", "country", "region", "aca_level", "region4"])
+
+
+def _fetch_aca_frame(timeout: int = 45) -> pd.DataFrame:
+    """Best-effort ACA download + parse; an empty frame on any failure."""
+    try:
+        aca_html = fetch_aca_html(timeout)
+    except Exception as e:
+        print("WARNING: ACA fetch failed, levels will show as N/A:", e, file=sys.stderr)
+        aca_html = None
+    return _load_aca(aca_html)
+
+
+def _gather_inputs(grid_html_path: str = GRID_DEFAULT_PATH, timeout: int = 45):
+    """
+    Parse docs/grid.html, download + parse the ACA page and download the
+    OurAirports CSV concurrently (latency ~ the slowest of the three).
+    Returns ((target, region_group), aca_df, coords_csv_path).
+    The ACA side is best-effort; the CSV is required.
+    """
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        grid = ex.submit(_parse_grid_target_and_region_group, grid_html_path)
+        aca = ex.submit(_fetch_aca_frame, timeout)
+        csv = ex.submit(fetch_coords_csv, timeout)
+        return grid.result(), aca.result(), csv.result()
+
+
+def parse_html_once(text: str):
+    """Parse an HTML blob with lxml once; callers run all their probes on the tree."""
+    return lxml.html.fromstring(text)
 
 
 def parse_aca_table(html: str) -> pd.DataFrame:
     """Return dataframe with: iata, airport, country, region, aca_level, region4."""
-    soup = BeautifulSoup(html, "lxml")
-    dfs = []
+    tree = parse_html_once(html)
 
-    table = soup.select_one(".airports-listview table")
-    if table is not None:
-        try:
-            dfs = pd.read_html(io.StringIO(str(table)))
-        except Exception:
-            dfs = []
+    # ".airports-listview table", located with lxml directly (no BeautifulSoup pass)
+    tables = tree.xpath(f"//*[{_class_xpath('airports-listview')}]//table")
+    target = tables[0] if tables else None
 
-    if not dfs:
-        all_tables = pd.read_html(html)
-        target = None
+    if target is None:
+        # Any table whose header carries the ACA columns; headers only, no DataFrames
         want = {"airport", "airport code", "country", "region", "level"}
-        for df in all_tables:
-            cols = {str(c).strip().lower() for c in df.columns}
+        for table in tree.iter("table"):
+            cols = {h.strip().lower() for h in _table_header(table)}
             if want.issubset(cols):
-                target = df
+                target = table
                 break
         if target is None:
             raise RuntimeError("ACA table not found on the page.")
-        dfs = [target]
 
-    raw = dfs[0]
+    raw = _table_frame(target)
     aca = (
         raw.rename(
             columns={
@@ -171,21 +267,47 @@ def parse_aca_table(html: str) -> pd.DataFrame:
         return r
 
     aca["region4"] = aca["region"].map(region4)
-    aca = aca[aca["aca_level"].isin(LEVELS)].dropna(subset=["iata"]).copy()
-    aca["iata"] = aca["iata"].astype(str).str.upper()
+    aca = aca.loc[aca["aca_level"].isin(LEVELS) & aca["iata"].notna()].assign(
+        iata=lambda d: d["iata"].str.upper()
+    )
     return aca
 
 
-def load_coords() -> pd.DataFrame:
-    url = "https://raw.githubusercontent.com/davidmegginson/ourairports-data/main/airports.csv"
+def load_coords(csv_path: str | None = None, keep_iatas: set[str] | None = None) -> pd.DataFrame:
+    """
+    OurAirports rows with iata/lat/lon/size. With keep_iatas, only those codes
+    are kept, filtered right after the read so the rest of the work runs on
+    the handful of rows the map can actually use.
+    """
+    if csv_path is None:
+        csv_path = fetch_coords_csv()
     use = ["iata_code", "latitude_deg", "longitude_deg", "type", "name", "iso_country"]
-    df = pd.read_csv(url, usecols=use).rename(columns={"iata_code": "iata"})
-    df = df.dropna(subset=["iata", "latitude_deg", "longitude_deg"]).copy()
-    df["iata"] = df["iata"].astype(str).str.upper()
-    df["size"] = df["type"].map(
-        {"large_airport": "large", "medium_airport": "medium"}
-    ).fillna("small")
-    return df
+    # Multi-threaded Arrow CSV reader; columns stay Arrow-backed (no object dtype).
+    # Only empty cells are missing, so Namibia's "NA" country code survives.
+    df = pd.read_csv(
+        csv_path,
+        usecols=use,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+        keep_default_na=False,
+        na_values=[""],
+    ).rename(columns={"iata_code": "iata"})
+    iata = df["iata"].str.upper()
+    if keep_iatas is not None:
+        mask = iata.isin(keep_iatas)
+        df, iata = df[mask], iata[mask]
+    df = df.assign(iata=iata).dropna(subset=["iata", "latitude_deg", "longitude_deg"])
+    # Empty name/country cells are <NA>, which neither `x or default` nor
+    # json.dumps can handle downstream; make them plain "" strings.
+    return df.assign(
+        name=lambda d: d["name"].fillna(""),
+        iso_country=lambda d: d["iso_country"].fillna(""),
+        size=lambda d: np.where(
+            d["type"].isin(["large_airport", "medium_airport"]),
+            d["type"].str.removesuffix("_airport"),
+            "small",
+        ),
+    )
 
 
 def _parse_grid_target_and_region_group(grid_html_path: str = GRID_DEFAULT_PATH):
@@ -196,17 +318,25 @@ def _parse_grid_target_and_region_group(grid_html_path: str = GRID_DEFAULT_PATH)
     Returns: (target_iata_or_none, region_group_or_none)
     """
     try:
-        if not os.path.exists(grid_html_path):
-            return None, None
+        st = os.stat(grid_html_path)
+    except OSError:
+        return None, None
+    return _parse_grid_cached(grid_html_path, st.st_mtime_ns, st.st_size)
+
+
+# Keyed by (path, mtime, size) so an unchanged grid.html is only read and parsed once
+@functools.lru_cache(maxsize=8)
+def _parse_grid_cached(grid_html_path: str, mtime_ns: int, size: int):
+    try:
         with open(grid_html_path, "r", encoding="utf-8") as f:
             html = f.read()
-        soup = BeautifulSoup(html, "lxml")
+        tree = parse_html_once(html)
 
         # Target IATA
         target = None
-        h = soup.select_one(".header h3")
-        if h:
-            txt = (h.get_text() or "").strip()
+        hs = tree.xpath(f"//*[{_class_xpath('header')}]//h3")
+        if hs:
+            txt = (hs[0].text_content() or "").strip()
             # expected: "LAX - overview of airports with similar throughput."
             m = re.match(r"^\s*([A-Z0-9]{2,4})\s*[-–—]", txt.upper())
             if m:
@@ -214,8 +344,8 @@ def _parse_grid_target_and_region_group(grid_html_path: str = GRID_DEFAULT_PATH)
 
         # Region group from the "regional peers" header
         region_group = None
-        for h3 in soup.select(".row .header h3"):
-            t = (h3.get_text() or "").strip()
+        for h3 in tree.xpath(f"//*[{_class_xpath('row')}]//*[{_class_xpath('header')}]//h3"):
+            t = (h3.text_content() or "").strip()
             if "regional peers" in t.lower():
                 m2 = re.search(r"\(([^)]+)\)\s*$", t)
                 if m2:
@@ -262,7 +392,7 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
       - We DO NOT restrict to Americas anymore; highlighted international peers keep correct ACA colors.
       - Initial view is set by target's region group parsed from docs/grid.html.
     """
-    parsed_target, parsed_region_group = _parse_grid_target_and_region_group(GRID_DEFAULT_PATH)
+    (parsed_target, parsed_region_group), aca, coords_path = _gather_inputs(GRID_DEFAULT_PATH)
 
     target_iata = (target_iata or "").strip().upper()
 
@@ -284,34 +414,36 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
 
     highlight = set([c for c in highlight_list if c])
 
-    aca_html = fetch_aca_html()
-    aca = parse_aca_table(aca_html)
-    coords = load_coords()
-
-    # Merge ALL ACA rows with coordinates (global), not just Americas
-    aca_all = (
-        aca.merge(coords, on="iata", how="left")
-           .dropna(subset=["latitude_deg", "longitude_deg"])
-           .copy()
+    # Only ACA airports (for the toggle metadata) and the highlights need coordinates
+    coords = load_coords(coords_path, keep_iatas=set(aca["iata"]) | highlight)
+
+    # Attach coordinates to ALL ACA rows (global), not just Americas.
+    # coords is already pruned to these codes, so a dict probe per row beats a merge.
+    coord_cols = [c for c in coords.columns if c != "iata"]
+    coord_idx = dict(zip(coords["iata"], zip(*(coords[c] for c in coord_cols))))
+    no_coords = (None,) * len(coord_cols)
+    looked_up = pd.DataFrame(
+        [coord_idx.get(code, no_coords) for code in aca["iata"]],
+        columns=coord_cols,
+        index=aca.index,
     )
-    if aca_all.empty:
-        raise RuntimeError("No rows after joining ACA table to coordinates.")
+    aca_all = pd.concat([aca, looked_up], axis=1).dropna(subset=["latitude_deg", "longitude_deg"])
 
     # Build a JSON blob with metadata for all ACA airports (global)
+    # (plain tuples from itertuples, level lookups via the LEVEL_INDEX tables)
     meta = {}
-    for _, row in aca_all.iterrows():
-        lvl = row.aca_level if row.aca_level in PALETTE else "Unknown"
-        lvl_badge = LEVEL_BADGE.get(lvl, "") if lvl != "Unknown" else ""
-        size_key = row.get("size", "small")
-        meta[str(row.iata)] = {
-            "lat": float(row.latitude_deg),
-            "lon": float(row.longitude_deg),
-            "lvl": lvl,
+    meta_cols = ["iata", "aca_level", "latitude_deg", "longitude_deg", "size", "country", "airport"]
+    for code, level, lat, lon, size_key, country, airport in aca_all[meta_cols].itertuples(index=False, name=None):
+        li = LEVEL_INDEX.get(level, UNKNOWN_INDEX)
+        meta[str(code)] = {
+            "lat": float(lat),
+            "lon": float(lon),
+            "lvl": LEVELS_ALL[li],
             "size": size_key,
-            "fill": PALETTE.get(lvl, "#666"),
-            "badge": lvl_badge,
-            "country": row.get("country", ""),
-            "airport": str(row.get("airport") or row.iata),
+            "fill": PALETTE_T[li],
+            "badge": BADGE_T[li],
+            "country": country,
+            "airport": str(airport or code),
         }
 
     # Guarantee all requested highlight codes can render, even if not ACA-scored
@@ -319,7 +451,7 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
         present_set = set(aca_all["iata"])
         missing = [c for c in highlight_list if c not in present_set]
         if missing:
-            extra = coords[coords["iata"].isin(missing)].copy()
+            extra = coords.loc[coords["iata"].isin(missing)]
             if not extra.empty:
                 extra = extra.assign(
                     airport=extra.get("name", extra["iata"]),
@@ -335,27 +467,32 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
                 aca_all = pd.concat([aca_all, extra[keep_cols]], ignore_index=True, sort=False)
                 aca_all = aca_all.drop_duplicates(subset=["iata"], keep="first")
 
-                for _, row in extra.iterrows():
-                    code = str(row.iata)
+                extra_cols = ["iata", "latitude_deg", "longitude_deg", "size", "country", "airport"]
+                for code, lat, lon, size_key, country, airport in extra[extra_cols].itertuples(index=False, name=None):
+                    code = str(code)
                     if code in meta:
                         continue
                     meta[code] = {
-                        "lat": float(row.latitude_deg),
-                        "lon": float(row.longitude_deg),
+                        "lat": float(lat),
+                        "lon": float(lon),
                         "lvl": "Unknown",
-                        "size": row.get("size", "small") if "size" in row else "small",
+                        "size": size_key or "small",
                         "fill": "#666",
                         "badge": "",
-                        "country": row.get("country", ""),
-                        "airport": str(row.get("airport") or row.iata),
+                        "country": country,
+                        "airport": str(airport or code),
                     }
 
+    if aca_all.empty:
+        raise RuntimeError("No rows after joining ACA table to coordinates.")
+
     # Plot only the highlight set if present
-    plot_df = aca_all[aca_all["iata"].isin(highlight)].copy() if highlight else aca_all.copy()
+    plot_df = aca_all.loc[aca_all["iata"].isin(highlight)] if highlight else aca_all
     if highlight:
         order_map = {code: i for i, code in enumerate(highlight_list)}
-        plot_df["__order__"] = plot_df["iata"].map(order_map).fillna(9999).astype(int)
-        plot_df = plot_df.sort_values("__order__")
+        plot_df = plot_df.assign(
+            __order__=plot_df["iata"].map(order_map).fillna(9999).astype(int)
+        ).sort_values("__order__")
 
     center_lat = float(plot_df["latitude_deg"].mean())
     center_lon = float(plot_df["longitude_deg"].mean())
@@ -372,15 +509,19 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
     fallback_pts = list(zip(plot_df["latitude_deg"].tolist(), plot_df["longitude_deg"].tolist()))
     _apply_initial_view(m, parsed_region_group, fallback_points=fallback_pts)
 
+    # One FeatureGroup per level that actually has an initial marker; empty groups
+    # would only add dead init JS. (Markers toggled in later go straight on the map.)
+    used = {LEVEL_INDEX.get(lvl, UNKNOWN_INDEX) for lvl in plot_df["aca_level"]}
     groups = {
         lvl: folium.FeatureGroup(name=lvl, show=True).add_to(m)
-        for lvl in (LEVELS + ["Unknown"])
+        for li, lvl in enumerate(LEVELS_ALL)
+        if li in used
     }
 
     updated = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
     # footer + zoom meter + stack styles
-    badge_html = (
+    badge_html = _fill_tokens(
         r"""
 <meta http-equiv="Cache-Control" content="no-cache, no-store, must-revalidate"/>
 <meta http-equiv="Pragma" content="no-cache"/>
@@ -448,18 +589,17 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
 </style>
 <div class="last-updated">Last updated: __UPDATED__</div>
 <div id="zoomMeter" class="zoom-meter">Zoom: --%</div>
-"""
-        .replace("__UPDATED__", updated)
-        .replace("__ROWGAP__", str(int(STACK_ROW_GAP_PX)))
+""",
+        {"UPDATED": updated, "ROWGAP": int(STACK_ROW_GAP_PX)},
     )
-    m.get_root().html.add_child(folium.Element(badge_html))
+    # Static overlays + JSON data blocks are collected here and attached to the
+    # page as a single folium Element (one render call instead of four).
+    overlay_parts = [badge_html]
 
     # custom legend
     legend_items = "".join(
-        '<div class="row"><span class="dot" style="background:{color}"></span>{lvl}</div>'.format(
-            color=PALETTE.get(lvl, "#666"), lvl=lvl
-        )
-        for lvl in reversed(LEVELS + ["Unknown"])
+        f'<div class="row"><span class="dot" style="background:{color}"></span>{lvl}</div>'
+        for lvl, color in reversed(list(zip(LEVELS_ALL, PALETTE_T)))
     )
     legend_html = (
         '<div class="legend-box">'
@@ -467,76 +607,50 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
         f"{legend_items}"
         "</div>"
     )
-    m.get_root().html.add_child(folium.Element(legend_html))
+    overlay_parts.append(legend_html)
 
     # Expose metadata to JS
     coords_json = json.dumps(meta, separators=(",", ":"))
-    m.get_root().html.add_child(
-        folium.Element(
-            f'<script id="aca-map-data" type="application/json">{coords_json}</script>'
-        )
+    overlay_parts.append(
+        f'<script id="aca-map-data" type="application/json">{coords_json}</script>'
     )
 
-    # dots + permanent tooltips for the initial highlighted set
-    for _, r in plot_df.iterrows():
-        lat, lon = float(r.latitude_deg), float(r.longitude_deg)
-        size_key = r.get("size", "small")
-        base_radius = RADIUS.get(size_key, 6)
-
-        radius = base_radius * 1.5
-        stroke_color = "rgba(0,0,0,0)"
-        stroke_weight = 0
-
-        fill_opacity = 0.80
-        offset_y_base = radius + max(stroke_weight, 0) + max(LABEL_GAP_PX, 1)
-        offset_y = -int(offset_y_base * LABEL_OFFSET_SCALE)
-
-        lvl = r.aca_level if r.aca_level in PALETTE else "Unknown"
-        dot = folium.CircleMarker(
-            [lat, lon],
-            radius=float(radius),
-            color=stroke_color,
-            weight=int(stroke_weight),
-            fill=True,
-            fill_color=PALETTE.get(lvl, "#666"),
-            fill_opacity=float(fill_opacity),
-            popup=folium.Popup(
-                "<b>{airport}</b><br>IATA: {iata}<br>ACA: <b>{lvl}</b><br>Country: {ctry}".format(
-                    airport=r.airport
-                    if pd.notna(r.get("airport")) and str(r.get("airport")).strip()
-                    else r.iata,
-                    iata=r.iata,
-                    lvl=lvl,
-                    ctry=r.get("country", ""),
-                ),
-                max_width=320,
-            ),
-        )
-
-        if lvl == "Unknown":
-            label_text = f"{r.iata}, N/A"
+    # Initial highlighted set: one GeoJSON FeatureCollection per level group.
+    # The JS below turns each collection into circle markers with a single
+    # L.geoJSON call instead of folium emitting a CircleMarker + Tooltip per row.
+    iatas = plot_df["iata"].astype(str).tolist()
+    lats = plot_df["latitude_deg"].to_numpy(dtype=np.float64)
+    lons = plot_df["longitude_deg"].to_numpy(dtype=np.float64)
+    sizes = plot_df["size"].fillna("small").tolist()
+    levels = plot_df["aca_level"].tolist()
+
+    markers = {}
+    for code, level, size_key, lat, lon in zip(iatas, levels, sizes, lats.tolist(), lons.tolist()):
+        li = LEVEL_INDEX.get(level, UNKNOWN_INDEX)
+        lvl = LEVELS_ALL[li]
+        if li == UNKNOWN_INDEX:
+            label_text = f"{code}, N/A"
         else:
-            lvl_badge = LEVEL_BADGE.get(lvl, "")
-            label_text = f"{r.iata}, {lvl_badge}"
-
-        label_color_style = (
-            ' style="color:#E74C3C;"' if (chosen and r.iata == chosen) else ""
-        )
-        label_html = f'<div class="ttxt"{label_color_style}>{label_text}</div>'
-
-        dot.add_child(
-            folium.Tooltip(
-                label_html,
-                permanent=True,
-                direction="top",
-                offset=(0, offset_y),
-                sticky=False,
-                class_name=f"iata-tt size-{size_key} tt-{r.iata}",
-                parse_html=True,
-            )
-        )
-
-        dot.add_to(groups[lvl])
+            label_text = f"{code}, {BADGE_T[li]}"
+
+        fc = markers.setdefault(lvl, {"type": "FeatureCollection", "features": []})
+        fc["features"].append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {
+                "iata": code,
+                "size": size_key,
+                "color": PALETTE_T[li],
+                "label": label_text,
+            },
+        })
+
+    markers_json = json.dumps(markers, separators=(",", ":"))
+    overlay_parts.append(
+        f'<script id="aca-map-markers" type="application/json">{markers_json}</script>'
+    )
+    m.get_root().html.add_child(folium.Element("\n".join(overlay_parts)))
+    group_names = {lvl: grp.get_name() for lvl, grp in groups.items()}
 
     # JS: zoom meter + clustering + dynamic marker toggling
     js = r"""
@@ -554,9 +668,10 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
     const STACK_ON_AT_Z = __STACK_ON_AT_Z__;
     const HIDE_LABELS_BELOW_Z = __HIDE_LABELS_BELOW_Z__;
     const GROUP_RADIUS_MILES = __GROUP_RADIUS_MILES__;
-
-    // Match Python label offset scaling
-    const OFFSET_SCALE = 0.7;
+    const GROUPS = __GROUPS__;
+    const RADIUS_BY_SIZE = __RADIUS_BY_SIZE__;
+    const LABEL_GAP_PX = __LABEL_GAP_PX__;
+    const OFFSET_SCALE = __LABEL_OFFSET_SCALE__;
 
     window.ACA_DB = window.ACA_DB || { latest:null, history:[] };
 
@@ -586,17 +701,73 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
       }
       const ACA_MARKERS = {};
 
-      // Register markers that were created by Python initially
+      // Single marker factory shared by the initial GeoJSON markers and table toggles
+      function makeMarker(latlng, iata, size, color, label, fillOpacity){
+        const radius = (RADIUS_BY_SIZE[size] || 6) * 1.5;
+        const offsetY = -Math.floor((radius + Math.max(LABEL_GAP_PX, 1)) * OFFSET_SCALE);
+        const style = (CHOSEN && iata === CHOSEN) ? ' style="color:#E74C3C;"' : '';
+        return L.circleMarker(latlng, {
+          radius: radius,
+          color: "rgba(0,0,0,0)",
+          weight: 0,
+          fill: true,
+          fillColor: color,
+          fillOpacity: fillOpacity,
+          iata: iata,
+          size: size
+        }).bindTooltip('<div class="ttxt"' + style + '>' + label + '</div>', {
+          permanent: true,
+          direction: "top",
+          offset: [0, offsetY],
+          sticky: false,
+          className: "iata-tt size-" + size
+        });
+      }
+
+      // Initial highlighted markers: one GeoJSON collection per ACA level group
+      function addInitialMarkers(){
+        let byLevel = {};
+        try {
+          const el = document.getElementById('aca-map-markers');
+          if (el) byLevel = JSON.parse(el.textContent || "{}");
+        } catch(e) {
+          byLevel = {};
+        }
+        Object.keys(byLevel).forEach(lvl => {
+          L.geoJSON(byLevel[lvl], {
+            pointToLayer: (f, latlng) => {
+              const p = f.properties;
+              return makeMarker(latlng, p.iata, p.size, p.color, p.label, 0.8);
+            }
+          }).addTo(window[GROUPS[lvl]] || map);
+        });
+      }
+      addInitialMarkers();
+
+      // Register the initial markers by the IATA code carried in their options
       function registerExistingMarkers(){
         map.eachLayer(lyr => {
           if (!(lyr instanceof L.CircleMarker)) return;
-          const tt = (lyr.getTooltip && lyr.getTooltip()) || null;
-          if (!tt || !tt._container) return;
-          const el = tt._container;
-          if (!el || !el.classList.contains('iata-tt')) return;
-          const cls = Array.from(el.classList);
-          const iata = (cls.find(c => c.startsWith('tt-')) || 'tt-').slice(3);
-          if (iata) ACA_MARKERS[iata] = lyr;
+          const iata = lyr.options.iata;
+          if (iata){
+            ACA_MARKERS[iata] = lyr;
+            bindPopup(iata, lyr);
+          }
+        });
+      }
+
+      // Popups are built on click from ACA_META rather than serialized per marker
+      function popupHtml(code){
+        const meta = ACA_META[code] || {};
+        return '<b>' + (meta.airport || code) + '</b><br>IATA: ' + code +
+               '<br>ACA: <b>' + (meta.lvl || 'Unknown') + '</b><br>Country: ' + (meta.country || '');
+      }
+      function bindPopup(code, lyr){
+        lyr.on('click', () => {
+          L.popup({ maxWidth: 320 })
+            .setLatLng(lyr.getLatLng())
+            .setContent(popupHtml(code))
+            .openOn(map);
         });
       }
       registerExistingMarkers();
@@ -647,17 +818,15 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
         const rect = rectBaseForPane(pane);
         const items = [];
         map.eachLayer(lyr=>{
-          if (!(lyr instanceof L.CircleMarker)) return;
+          if (!(lyr instanceof L.CircleMarker) || !lyr.options.iata) return;
           const tt = (lyr.getTooltip && lyr.getTooltip()) || null;
           if (!tt || !tt._container) return;
           const el = tt._container;
-          if (!el || !el.classList.contains('iata-tt')) return;
           el.style.display = '';
           const latlng = lyr.getLatLng();
           const pt = map.latLngToContainerPoint(latlng);
-          const cls = Array.from(el.classList);
-          const size = (cls.find(c=>c.startsWith('size-'))||'size-small').slice(5);
-          const iata = (cls.find(c=>c.startsWith('tt-'))||'tt-').slice(3);
+          const iata = lyr.options.iata;
+          const size = lyr.options.size || 'small';
 
           const txt = (el.textContent || '').split(',');
           const level = (txt.length > 1 ? txt[1].trim() : '');
@@ -764,44 +933,16 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
             const meta = ACA_META[code];
             if (!meta) return;
 
-            const sizeKey = meta.size || 'small';
-            const baseRadius = (sizeKey === 'large' ? 8 : (sizeKey === 'medium' ? 7 : 6));
-            const radius = baseRadius * 1.5;
-            const strokeColor = "rgba(0,0,0,0)";
-            const strokeWeight = 0;
-            const fillOpacity = 0.95;
-            const offsetBase = radius + Math.max(strokeWeight, 0) + Math.max(5, 1);
-            const offsetY = -Math.round(offsetBase * OFFSET_SCALE);
-
             const lvl = meta.lvl || "Unknown";
-            const fillColor = meta.fill || "#666";
-
-            const dot = L.circleMarker(
-              [meta.lat, meta.lon],
-              {
-                radius: radius,
-                color: strokeColor,
-                weight: strokeWeight,
-                fill: true,
-                fillColor: fillColor,
-                fillOpacity: fillOpacity
-              }
-            );
-
             let labelText;
             if (lvl === "Unknown") labelText = code + ", N/A";
             else labelText = code + ", " + (meta.badge || "");
 
-            const labelHtml = '<div class="ttxt">' + labelText + '</div>';
-
-            dot.bindTooltip(labelHtml, {
-              permanent:true,
-              direction:"top",
-              offset:[0, offsetY],
-              sticky:false,
-              className:"iata-tt size-" + sizeKey + " tt-" + code
-            });
+            const dot = makeMarker(
+              [meta.lat, meta.lon], code, meta.size || 'small', meta.fill || "#666", labelText, 0.95
+            );
 
+            bindPopup(code, dot);
             dot.addTo(map);
             ACA_MARKERS[code] = dot;
           }
@@ -820,31 +961,78 @@ def build_map(target_iata=None, highlight_iatas=None) -> folium.Map:
 })();
 """
 
-    js = (
-        js.replace("__MAP_NAME__", m.get_name())
-        .replace("__ZOOM_SNAP__", str(float(ZOOM_SNAP)))
-        .replace("__ZOOM_DELTA__", str(float(ZOOM_DELTA)))
-        .replace("__WHEEL_PX__", str(int(WHEEL_PX_PER_ZOOM)))
-        .replace("__WHEEL_DEBOUNCE__", str(int(WHEEL_DEBOUNCE_MS)))
-        .replace("__DB_MAX_HISTORY__", str(int(DB_MAX_HISTORY)))
-        .replace("__UPDATE_DEBOUNCE_MS__", str(int(UPDATE_DEBOUNCE_MS)))
-        .replace("__STACK_ON_AT_Z__", str(float(STACK_ON_AT_Z)))
-        .replace("__HIDE_LABELS_BELOW_Z__", str(float(HIDE_LABELS_BELOW_Z)))
-        .replace("__GROUP_RADIUS_MILES__", str(float(GROUP_RADIUS_MILES)))
-        .replace("__CHOSEN__", chosen or "")
-    )
+    js = _fill_tokens(js, {
+        "MAP_NAME": m.get_name(),
+        "ZOOM_SNAP": float(ZOOM_SNAP),
+        "ZOOM_DELTA": float(ZOOM_DELTA),
+        "WHEEL_PX": int(WHEEL_PX_PER_ZOOM),
+        "WHEEL_DEBOUNCE": int(WHEEL_DEBOUNCE_MS),
+        "DB_MAX_HISTORY": int(DB_MAX_HISTORY),
+        "UPDATE_DEBOUNCE_MS": int(UPDATE_DEBOUNCE_MS),
+        "STACK_ON_AT_Z": float(STACK_ON_AT_Z),
+        "HIDE_LABELS_BELOW_Z": float(HIDE_LABELS_BELOW_Z),
+        "GROUP_RADIUS_MILES": float(GROUP_RADIUS_MILES),
+        "CHOSEN": chosen or "",
+        "GROUPS": json.dumps(group_names),
+        "RADIUS_BY_SIZE": json.dumps(RADIUS),
+        "LABEL_GAP_PX": int(LABEL_GAP_PX),
+        "LABEL_OFFSET_SCALE": float(LABEL_OFFSET_SCALE),
+    })
 
     m.get_root().script.add_child(folium.Element(js))
     return m
 
 
+def _inputs_digest(timeout: int = 45) -> str:
+    """
+    sha256 over everything aca_map.html is built from: docs/grid.html, the ACA
+    page, the airports CSV (both via the conditional-GET cache) and this script.
+    """
+    h = hashlib.sha256()
+    h.update(fetch_aca_html(timeout).encode("utf-8"))
+    with open(fetch_coords_csv(timeout), "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    for path in (GRID_DEFAULT_PATH, os.path.abspath(__file__)):
+        h.update(b"\0")
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
 if __name__ == "__main__":
     os.makedirs(OUT_DIR, exist_ok=True)
+
+    # Skip the build when none of the inputs changed since the last good map.
+    # If hashing fails (e.g. ACA page down) just build; build_map handles that.
+    try:
+        digest = _inputs_digest()
+    except Exception:
+        digest = None
+    try:
+        with open(MAP_HASH_FILE, "r", encoding="utf-8") as f:
+            previous = f.read().strip()
+    except OSError:
+        previous = None
+    if digest and digest == previous and os.path.exists(OUT_FILE):
+        print("Inputs unchanged, keeping", OUT_FILE)
+        sys.exit(0)
+
     try:
         fmap = build_map()
-        fmap.save(OUT_FILE)
+        write_map_html(fmap, OUT_FILE)
         print("Wrote", OUT_FILE)
+        if digest:
+            tmp = MAP_HASH_FILE + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(digest)
+            os.replace(tmp, MAP_HASH_FILE)
     except Exception as e:
         print("ERROR building map:", e, file=sys.stderr)
         write_error_page(str(e))
+        if os.path.exists(MAP_HASH_FILE):
+            os.remove(MAP_HASH_FILE)
         sys.exit(0)
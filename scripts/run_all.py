@@ -4,30 +4,81 @@
 
 import os
 import time
+import threading
+import gzip
 import json
+import shutil
+import hashlib
 import argparse
+import multiprocessing
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-from build_grid import build_grid
-from build_aca_table import build_aca_table_html
-from build_map import build_map
+import jinja2
+import minify_html
+
+# orjson is optional: ~5-10x faster and returns bytes; stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The builders (pandas/openpyxl/folium) are imported inside the functions that
+# use them, so --help and argument errors don't pay ~1 s of imports.
 
 # Updated ACI file location
 EXCEL_PATH = "data/Copy of ACI 2024 North America Traffic Report (1).xlsx"
 
+# Bump whenever builder code changes so cached runs (keyed by _inputs_hash)
+# are rebuilt instead of reused.
+BUILDER_VERSION = "2"
+
+# Files a run produces: each page has a precompressed .gz sibling (the map
+# also a .br one when brotli is installed)
+RUN_FILES = (
+    "grid.html", "grid.html.gz",
+    "aca_table.html", "aca_table.html.gz",
+    "aca_map.html", "aca_map.html.gz", "aca_map.html.br",
+)
+
 DOCS_DIR = "docs"
-RUNS_DIR = os.path.join(DOCS_DIR, "runs")
-MANIFEST = os.path.join(RUNS_DIR, "index.json")
+ASSETS_DIR = f"{DOCS_DIR}/assets"
+RUNS_DIR = f"{DOCS_DIR}/runs"
+MANIFEST = f"{RUNS_DIR}/index.json"
+MAX_RUNS = 100  # manifest keeps only the most recent runs
 
 # Stable "live" outputs for an in-page run experience (page can always load docs/live/*)
-LIVE_DIR = os.path.join(DOCS_DIR, "live")
-LIVE_STATUS = os.path.join(LIVE_DIR, "status.json")
-
-# Use simple tokens instead of .format() to avoid brace conflicts in CSS/JS.
-DASHBOARD_TEMPLATE = r"""<!doctype html><meta charset="utf-8">
-<title>__TITLE__</title>
-<meta name="viewport" content="width=device-width, initial-scale=1"/>
-<style>
-  :root {
+LIVE_DIR = f"{DOCS_DIR}/live"
+LIVE_STATUS = f"{LIVE_DIR}/status.json"
+
+# Dashboard shell: scripts/templates/index.html.j2 (styles/script live in
+# docs/assets/, below). Jinja keeps the compiled template in .jinja_cache/, so
+# later runs load it from there instead of lexing/parsing the source again.
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+JINJA_CACHE_DIR = ".jinja_cache"
+
+@lru_cache(maxsize=1)
+def _index_template() -> jinja2.Template:
+    Path(JINJA_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(JINJA_CACHE_DIR),
+        keep_trailing_newline=True,
+    )
+    return env.get_template("index.html.j2")
+
+def render_index(title: str, grid_rel: str, aca_rel: str, map_rel: str, iata: str,
+                 css_v: str, js_v: str, manifest_json: str) -> str:
+    return _index_template().render(
+        title=title, grid_rel=grid_rel, aca_rel=aca_rel, map_rel=map_rel, iata=iata,
+        css_v=css_v, js_v=js_v, manifest_json=manifest_json,
+    )
+
+# Dashboard CSS/JS live in docs/assets/ so every dashboard shares one browser
+# cache entry; the ?v= content hash in the page busts it when they change.
+DASHBOARD_CSS = r"""  :root {
     --bg:#f6f8fb; --ink:#1f2937; --muted:#6b7280; --border:#e5e7eb; --card:#fff; --accent:#0d6efd;
   }
   html,body { margin:0; padding:0; background:var(--bg); color:var(--ink); font:16px/1.45 -apple-system,BlinkMacSystemFont,"Segoe UI",Roboto,Arial,sans-serif; }
@@ -63,94 +114,9 @@ DASHBOARD_TEMPLATE = r"""<!doctype html><meta charset="utf-8">
   .btn-primary { background:var(--accent); color:#fff; border-color:var(--accent); }
   .btn-primary:hover { filter:brightness(0.95); }
   .hint { font-size:12px; color:var(--muted); }
-</style>
-
-<div class="wrap">
-  <div class="topbar">
-    <h2 id="title">__TITLE__</h2>
-    <div class="row">
-      <button id="btnReset" class="btn" type="button">Reset / Choose another run</button>
-
-      <!-- CHANGED: this button runs a build from the site (no GitHub access required) -->
-      <button id="btnRunHelp" class="btn" type="button">Run new build</button>
-    </div>
-  </div>
-
-  <div class="card">
-    <div class="muted">Similar-throughput airports grid</div>
-    <iframe id="gridFrame" src="__GRID__" title="Similar-throughput grid"></iframe>
-  </div>
-
-  <div class="card">
-    <div class="muted">ACA scores for airports with similar throughput (__IATA__)</div>
-    <iframe id="acaFrame" src="__ACA__" title="ACA scores table"></iframe>
-  </div>
-
-  <div class="card">
-    <div class="muted">ACA map (Americas)</div>
-    <iframe id="mapFrame" src="__MAP__" title="ACA Map"></iframe>
-  </div>
-</div>
-
-<!-- Modal: Reset / Choose another run -->
-<div class="modal-backdrop" id="modalBg" aria-hidden="true">
-  <div class="modal" role="dialog" aria-modal="true" aria-labelledby="modalTitle">
-    <h3 id="modalTitle">Reset / Choose another run</h3>
-    <div class="grid">
-      <div>
-        <label for="runSelect">Pick from previous runs</label>
-        <select id="runSelect"><option value="">Loading…</option></select>
-        <div class="hint">Switch instantly to any run that is already built.</div>
-      </div>
-      <div>
-        <label>Run a new build</label>
-        <div class="hint">
-          Use “Run new build” at the top right to start a run.
-          After it finishes, refresh this page and pick the new run on the left.
-        </div>
-      </div>
-    </div>
-    <div class="actions">
-      <button class="btn" id="btnClose" type="button">Close</button>
-      <button class="btn btn-primary" id="btnApplyRun" type="button">View selected run</button>
-    </div>
-  </div>
-</div>
-
-<!-- Modal: Run new build (public trigger via Cloudflare Worker) -->
-<div class="modal-backdrop" id="runModalBg" aria-hidden="true">
-  <div class="modal" role="dialog" aria-modal="true" aria-labelledby="runModalTitle">
-    <h3 id="runModalTitle">Run a new build</h3>
-
-    <div class="hint" style="font-size:13px; margin-bottom:10px; color:#374151;">
-      Enter an IATA code and start a build. It takes about <strong>1.5 minutes</strong> to finish and publish.
-      This page will auto-update when the new run appears.
-    </div>
-
-    <div style="margin-top:12px;">
-      <label for="iataInput" style="display:block; font-size:13px; color:#374151; margin-bottom:4px;">IATA code</label>
-      <input id="iataInput" placeholder="LAX" maxlength="3"
-        style="width:100%; font:14px/1.2 inherit; padding:8px 10px; border-radius:8px; border:1px solid #e5e7eb; background:#fff;" />
-      <div id="runMsg" class="hint" style="margin-top:8px;"></div>
-
-      <div class="actions" style="margin-top:12px;">
-        <button class="btn" id="btnRunClose" type="button">Close</button>
-        <button
-          class="btn btn-primary"
-          id="btnRunNow"
-          type="button"
-          style="padding:6px 10px; border-radius:10px; font-size:13px; line-height:1.1; white-space:nowrap; max-width:100%;"
-        >
-          Run build now
-        </button>
-
-      </div>
-    </div>
-  </div>
-</div>
-
-<script>
-(function(){
+"""
+
+DASHBOARD_JS = r"""(function(){
   const runManifestUrl = "runs/index.json";
   const gridFrame = document.getElementById('gridFrame');
   const acaFrame  = document.getElementById('acaFrame');
@@ -220,11 +186,23 @@ DASHBOARD_TEMPLATE = r"""<!doctype html><meta charset="utf-8">
     if (e.target === runModalBg) closeRunModal();
   });
 
-  async function loadRuns(){
+  // The manifest is inlined into the page at build time; only polling for a
+  // new run (fresh=true) or a missing/broken inline copy goes to the network.
+  function inlineRuns(){
+    try {
+      const el = document.getElementById('runs-manifest');
+      return el ? JSON.parse(el.textContent) : null;
+    } catch(e){ return null; }
+  }
+
+  async function loadRuns(fresh){
     try{
-      const res = await fetch(runManifestUrl, {cache:"no-store"});
-      if (!res.ok) throw new Error("HTTP " + res.status);
-      const data = await res.json();
+      let data = fresh ? null : inlineRuns();
+      if (!data){
+        const res = await fetch(runManifestUrl, {cache:"no-store"});
+        if (!res.ok) throw new Error("HTTP " + res.status);
+        data = await res.json();
+      }
       runsCache = data.runs || [];
       renderRunOptions(runsCache);
       return runsCache;
@@ -234,21 +212,41 @@ DASHBOARD_TEMPLATE = r"""<!doctype html><meta charset="utf-8">
     }
   }
 
+  // Only the newest RUN_WINDOW runs are rendered up front; the rest are
+  // appended the first time the picker gets focus.
+  const RUN_WINDOW = 25;
+
+  function mkOpt(r){
+    const opt = document.createElement('option');
+    opt.value = r.path;
+    opt.textContent = `${r.iata} — ${new Date((r.ts||0)*1000).toLocaleString()}`;
+    return opt;
+  }
+
   function renderRunOptions(runs){
+    runSelect.textContent = "";
+    runSelect._pending = null;
     if (!runs.length){
       runSelect.innerHTML = '<option value="">No prior runs</option>';
       return;
     }
     runs.sort((a,b)=> (b.ts||0) - (a.ts||0));
-    runSelect.innerHTML = runs.map(r=>{
-      const label = `${r.iata} — ${new Date((r.ts||0)*1000).toLocaleString()}`;
-      return `<option value="${r.path}">${label}</option>`;
-    }).join("");
+    for (const r of runs.slice(0, RUN_WINDOW)) runSelect.appendChild(mkOpt(r));
+    if (runs.length > RUN_WINDOW) runSelect._pending = runs.slice(RUN_WINDOW);
   }
 
+  runSelect.addEventListener('focus', ()=>{
+    if (!runSelect._pending) return;
+    for (const r of runSelect._pending) runSelect.appendChild(mkOpt(r));
+    runSelect._pending = null;
+  });
+
   function switchToRun(run){
     if (!run || !run.path) return;
     const p = run.path;
+    // keep the below-the-fold frames deferred when switching runs
+    acaFrame.loading = "lazy";
+    mapFrame.loading = "lazy";
     gridFrame.src = p + "/grid.html";
     acaFrame.src  = p + "/aca_table.html";
     mapFrame.src  = p + "/aca_map.html";
@@ -268,7 +266,7 @@ DASHBOARD_TEMPLATE = r"""<!doctype html><meta charset="utf-8">
   async function waitForRun(iata, startTs){
     const deadline = Date.now() + 150000; // ~2.5 min
     while (Date.now() < deadline){
-      const list = await loadRuns(); // refresh cache + dropdown
+      const list = await loadRuns(true); // refresh cache + dropdown
       const found = (list || []).find(r => (r.iata || "").toUpperCase() === iata && (r.ts || 0) > startTs);
       if (found) return found;
       await new Promise(res => setTimeout(res, 4000)); // poll every ~4s
@@ -287,7 +285,7 @@ DASHBOARD_TEMPLATE = r"""<!doctype html><meta charset="utf-8">
     runMsg.textContent = "Starting build…";
 
     // Record current latest timestamp for this IATA so we can detect the new run
-    const initialList = await loadRuns();
+    const initialList = await loadRuns(true);
     const latest = (initialList || [])
       .filter(r => (r.iata || "").toUpperCase() === iata)
       .sort((a,b)=> (b.ts||0) - (a.ts||0))[0];
@@ -326,29 +324,373 @@ DASHBOARD_TEMPLATE = r"""<!doctype html><meta charset="utf-8">
     }
   });
 
-  loadRuns();
+  // ?run=runs/<IATA>-<ts> opens that snapshot directly (shareable link;
+  // snapshots carry no index.html of their own)
+  loadRuns().then(runs => {
+    const run = new URLSearchParams(location.search).get("run");
+    if (!run || !/^runs\/[A-Za-z0-9_-]+$/.test(run)) return;
+    switchToRun(runs.find(r => r.path === run) || { path: run, iata: run.split("/").pop().split("-")[0] });
+  });
 })();
-</script>
 """
 
+def _dumps(obj) -> bytes:
+    """Compact UTF-8 JSON (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _loads(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 def _load_manifest():
+    # runs is a bounded deque: appending past MAX_RUNS drops the oldest entry
     if not os.path.exists(MANIFEST):
-        return {"runs": []}
+        return {"runs": deque(maxlen=MAX_RUNS)}
     try:
-        with open(MANIFEST, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return {"runs": deque(_loads(Path(MANIFEST).read_bytes()).get("runs", []), maxlen=MAX_RUNS)}
     except Exception:
-        return {"runs": []}
+        return {"runs": deque(maxlen=MAX_RUNS)}
 
 def _save_manifest(man):
-    os.makedirs(RUNS_DIR, exist_ok=True)
-    with open(MANIFEST, "w", encoding="utf-8") as f:
-        json.dump(man, f, ensure_ascii=False, indent=2)
+    Path(MANIFEST).write_bytes(_dumps({"runs": list(man["runs"])}))
 
 def _write_live_status(payload: dict) -> None:
-    os.makedirs(LIVE_DIR, exist_ok=True)
-    with open(LIVE_STATUS, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    Path(LIVE_STATUS).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def _upstream_digest() -> str | None:
+    """
+    Fingerprint of the downloaded inputs (ACA page, airports CSV), after
+    revalidating both through the conditional-GET cache; the builders then
+    read them from that cache (304s). None when either download fails, so
+    nothing is reused against inputs that couldn't be checked.
+    """
+    from aca_source import fetch_aca_html
+    from build_map import fetch_coords_csv
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fut_aca = pool.submit(fetch_aca_html)
+            fut_csv = pool.submit(fetch_coords_csv)
+            aca_text, csv_path = fut_aca.result(), fut_csv.result()
+        h = hashlib.blake2b(aca_text.encode("utf-8"), digest_size=16)
+        with open(csv_path, "rb") as f:
+            h.update(hashlib.file_digest(f, "blake2b").digest())
+        return h.hexdigest()
+    except Exception as e:
+        print("WARNING: could not revalidate ACA/airports downloads:", e)
+        return None
+
+def _inputs_hash(iata: str, upstream: str) -> str:
+    """
+    MD5 of (iata, workbook contents, upstream digest, BUILDER_VERSION):
+    identical inputs -> same key. The workbook is hashed by content, not
+    mtime, which changes on every fresh checkout.
+    """
+    h = hashlib.md5()
+    h.update(iata.encode())
+    with open(EXCEL_PATH, "rb") as f:
+        h.update(hashlib.file_digest(f, "md5").digest())
+    h.update(upstream.encode())
+    h.update(BUILDER_VERSION.encode())
+    return h.hexdigest()
+
+def _map_key(iata: str, highlight, upstream: str) -> str:
+    """
+    Fingerprint of everything the map is built from: target, highlighted set
+    and the ACA page + airports CSV it reads (upstream, see _upstream_digest).
+    """
+    return hashlib.blake2b(
+        f"{iata}|{','.join(sorted(highlight))}|{upstream}|{BUILDER_VERSION}".encode(), digest_size=12
+    ).hexdigest()
+
+def _find_cached_run(manifest: dict, key: str, field: str = "key",
+                     names=("grid.html", "aca_table.html", "aca_map.html")):
+    """Most recent manifest run whose field == key and whose named files are still on disk."""
+    for run in reversed(manifest.get("runs", [])):
+        if run.get(field) != key:
+            continue
+        run_dir = f"{DOCS_DIR}/{run.get('path', '')}"
+        if all(os.path.exists(f"{run_dir}/{n}") for n in names):
+            return run
+    return None
+
+def _minify(html: str) -> str:
+    """Same minifier build_map uses for the map page (inline CSS/JS included)."""
+    return minify_html.minify(html, minify_js=True, minify_css=True)
+
+def _write_gz(path: str, data: bytes) -> None:
+    """Precompressed path + ".gz" sibling for static hosting."""
+    with gzip.open(path + ".gz", "wb", compresslevel=6) as g:
+        g.write(data)
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """
+    Hardlink src to dst (O(1), no extra disk); copy when linking isn't possible
+    (Windows, across filesystems). dst is removed first so an existing link is
+    replaced rather than written through.
+    """
+    try:
+        os.remove(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def _write_asset(name: str, text: str) -> str:
+    """Write docs/assets/<name> (+ .gz) only if its content changed; returns a short content hash."""
+    data = text.encode("utf-8")
+    path = f"{ASSETS_DIR}/{name}"
+    try:
+        unchanged = Path(path).read_bytes() == data and os.path.exists(path + ".gz")
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        Path(ASSETS_DIR).mkdir(parents=True, exist_ok=True)
+        Path(path).write_bytes(data)
+        _write_gz(path, data)
+    return hashlib.md5(data).hexdigest()[:10]
+
+def _write_dashboard(iata: str, manifest: dict) -> None:
+    # Inline the manifest so the run picker needs no fetch on page load
+    # ("</" escaped so it can't close the <script> early).
+    manifest_json = _dumps({"runs": list(manifest["runs"])}).decode("utf-8")
+    dash_html = render_index(
+        title=f"{iata} — Grid + ACA + Map",
+        grid_rel="grid.html",
+        aca_rel="aca_table.html",
+        map_rel="aca_map.html",
+        iata=iata,
+        css_v=_write_asset("dash.css", DASHBOARD_CSS),
+        js_v=_write_asset("dash.js", DASHBOARD_JS),
+        manifest_json=manifest_json.replace("</", "<\\/"),
+    )
+    dash_bytes = _minify(dash_html).encode("utf-8")
+    Path(f"{DOCS_DIR}/index.html").write_bytes(dash_bytes)
+    _write_gz(f"{DOCS_DIR}/index.html", dash_bytes)
+
+def _write_snapshot(run_dir: str, names, manifest: dict | None = None) -> None:
+    """
+    Hardlink (or copy) the named docs/ outputs into live/ and run_dir, then,
+    if given, save the updated manifest. Runs on a background thread; the
+    per-file link/copy calls fan out over a small pool (slow runner disks).
+    """
+    def one(name):
+        src = f"{DOCS_DIR}/{name}"
+        if not os.path.exists(src):
+            return
+        _link_or_copy(src, f"{LIVE_DIR}/{name}")
+        _link_or_copy(src, f"{run_dir}/{name}")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(one, names))
+    if manifest is not None:
+        _save_manifest(manifest)
+
+def _mp_context():
+    """
+    Start method for builder child processes. Never plain fork: the parent has
+    live threads (snapshot pool, downloads) whose locks a forked child could
+    inherit mid-acquire and deadlock on. Children fork from a forkserver that
+    imported the builder stack once (spawn, re-importing per child, where
+    forkserver is unavailable).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["build_grid", "build_aca_table", "build_map", "_excel_cache"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+# Process-pool workers: module-level so they pickle, and they return plain
+# str/bytes (a folium Map doesn't travel between processes cleanly). The map is
+# rendered and UTF-8 encoded once, in the worker.
+def _build_aca_html(iata: str) -> str:
+    from build_aca_table import build_aca_table_html
+
+    page, _df = build_aca_table_html(iata)
+    return page
+
+def _build_map_html(iata: str, highlight: tuple) -> bytes:
+    from build_map import build_map, render_map_html
+
+    return render_map_html(build_map(target_iata=iata, highlight_iatas=set(highlight))).encode("utf-8")
+
+def run_one(iata: str, gh_owner: str, gh_repo: str, workflow_file: str) -> None:
+    """Build grid + ACA table + map for one IATA and publish them (plus dashboard) to docs/."""
+    iata = iata.upper()
+
+    # docs/ and docs/live/ in one call; docs/runs/ comes with run_dir below
+    Path(LIVE_DIR).mkdir(parents=True, exist_ok=True)
+
+    # 0) Same IATA + same Excel + same ACA/airports data + same builder
+    #    version as a prior run? Reuse its outputs instead of rebuilding.
+    #    The downloads are revalidated on a thread while the grid (step 1) is
+    #    computed, so that network time overlaps it; a cache hit discards the grid.
+    from build_grid import build_grid
+    from _excel_cache import load_aci
+    from build_map import write_map_html
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        fut_upstream = pool.submit(_upstream_digest)
+        grid_res = build_grid(EXCEL_PATH, iata, df=load_aci(EXCEL_PATH))
+        upstream = fut_upstream.result()
+    key = _inputs_hash(iata, upstream) if upstream else None
+    manifest = _load_manifest()
+    cached = _find_cached_run(manifest, key) if key else None
+    if cached is not None:
+        src_dir = f"{DOCS_DIR}/{cached['path']}"
+        for name in RUN_FILES:
+            src = f"{src_dir}/{name}"
+            for dst in (f"{DOCS_DIR}/{name}", f"{LIVE_DIR}/{name}"):
+                if os.path.exists(src):
+                    _link_or_copy(src, dst)  # replaces dst
+                else:
+                    # A sibling the cached run lacks (e.g. no .br without
+                    # brotli) must not leave the previous run's file behind.
+                    try:
+                        os.remove(dst)
+                    except FileNotFoundError:
+                        pass
+        _write_dashboard(iata, manifest)
+        try:
+            _write_live_status({"ok": True, "iata": iata, "status": "complete", "ts": cached.get("ts")})
+        except Exception:
+            pass
+        print(f"Inputs unchanged (key {key}); reused {src_dir}")
+        return
+
+    # One timestamp names the run everywhere (status, snapshot dir, manifest)
+    ts = int(time.time())
+    run_path = f"runs/{iata}-{ts}"  # relative to docs/, as stored in the manifest
+    run_dir = f"{DOCS_DIR}/{run_path}"
+
+    # Optional: mark "running" for live UI polling
+    try:
+        _write_live_status({"ok": False, "iata": iata, "status": "running", "ts": ts})
+    except Exception:
+        pass
+
+    # docs/ outputs may be hardlinks into an earlier snapshot; unlink them so
+    # the builders below write new files instead of truncating that snapshot.
+    for name in RUN_FILES:
+        try:
+            os.remove(f"{DOCS_DIR}/{name}")
+        except FileNotFoundError:
+            pass
+
+    Path(run_dir).mkdir(parents=True, exist_ok=True)
+
+    # 1) Grid (throughput-only similarity, built in step 0). Written first: the
+    #    ACA table and the map both read docs/grid.html. Their downloads are
+    #    already cached (revalidated in step 0).
+    grid_out_path = f"{DOCS_DIR}/grid.html"
+    grid_bytes = _minify(grid_res["html"]).encode("utf-8")
+    Path(grid_out_path).write_bytes(grid_bytes)
+    _write_gz(grid_out_path, grid_bytes)
+
+    # Snapshot the grid in the background while the other builders run
+    t_grid = threading.Thread(target=_write_snapshot, args=(run_dir, RUN_FILES[:2]))
+    t_grid.start()
+
+    # 2) + 3) ACA table (competitors from docs/grid.html) and map (highlight
+    #    grid competitors) are independent of each other -> separate processes.
+    #    A prior run with the same target + highlight set, built from the same
+    #    ACA/airports data, already has the map.
+    highlight = tuple(sorted(set(grid_res.get("union", []))))
+    map_key = _map_key(iata, highlight, upstream) if upstream else None
+    prev_map = (
+        _find_cached_run(manifest, map_key, field="map_key", names=("aca_map.html",))
+        if map_key else None
+    )
+    if prev_map is None:
+        with ProcessPoolExecutor(max_workers=2, mp_context=_mp_context()) as ex:
+            fut_aca = ex.submit(_build_aca_html, iata)
+            fut_map = ex.submit(_build_map_html, iata, highlight)
+            aca_html = fut_aca.result()
+            map_bytes = fut_map.result()
+    else:
+        aca_html = _build_aca_html(iata)
+        map_bytes = None
+
+    # The map write (plus its gzip/brotli siblings) goes to a thread so it
+    # overlaps minifying and writing the table; zlib/brotli release the GIL.
+    t_map = None
+    if map_bytes is not None:
+        t_map = threading.Thread(target=write_map_html, args=(map_bytes, f"{DOCS_DIR}/aca_map.html"))
+        t_map.start()
+    aca_path = f"{DOCS_DIR}/aca_table.html"
+    aca_bytes = _minify(aca_html).encode("utf-8")
+    Path(aca_path).write_bytes(aca_bytes)
+    _write_gz(aca_path, aca_bytes)
+    if t_map is not None:
+        t_map.join()
+        map_size = len(map_bytes)
+    else:
+        src_dir = f"{DOCS_DIR}/{prev_map['path']}"
+        for name in ("aca_map.html", "aca_map.html.gz", "aca_map.html.br"):
+            if os.path.exists(f"{src_dir}/{name}"):
+                _link_or_copy(f"{src_dir}/{name}", f"{DOCS_DIR}/{name}")
+        map_size = os.path.getsize(f"{DOCS_DIR}/aca_map.html")
+        print(f"Map inputs unchanged (map_key {map_key}); reused {src_dir}/aca_map.html")
+
+    # 4) Dashboard (with this run already in its inlined manifest)
+    manifest["runs"].append({
+        "ts": ts, "iata": iata, "path": run_path, "key": key, "map_key": map_key,
+        # uncompressed bytes of the three pages
+        "size": len(grid_bytes) + len(aca_bytes) + map_size,
+    })
+    _write_dashboard(iata, manifest)
+
+    # 4.5) Stable live outputs + 5) snapshot + manifest, on a background
+    #      thread: docs/ is already complete, live/ and the run dir only get
+    #      hardlinks (or copies) of it.
+    t_grid.join()
+    t_snap = threading.Thread(
+        target=_write_snapshot,
+        args=(run_dir, RUN_FILES[2:]),
+        kwargs={"manifest": manifest},
+    )
+    t_snap.start()
+
+    print("Wrote:")
+    print("  docs/grid.html")
+    print("  docs/aca_table.html")
+    print("  docs/aca_map.html")
+    print("  docs/index.html")
+    print("  docs/live/grid.html")
+    print("  docs/live/aca_table.html")
+    print("  docs/live/aca_map.html")
+    print("  docs/live/status.json")
+    print(f"  {run_dir}/grid.html")
+    print(f"  {run_dir}/aca_table.html")
+    print(f"  {run_dir}/aca_map.html")
+    print("Updated manifest:", MANIFEST)
+
+    t_snap.join()
+
+    # Mark live as complete (for polling)
+    try:
+        _write_live_status({"ok": True, "iata": iata, "status": "complete", "ts": ts})
+    except Exception:
+        pass
+
+def run_many(iatas, gh_owner: str, gh_repo: str, workflow_file: str) -> None:
+    """
+    run_one per IATA, each in a fresh child process so pandas/openpyxl/
+    folium state from one build is released before the next (peak RSS stays at
+    single-run level however long the batch is).
+    With _mp_context's forkserver, a batch of N pays the pandas/openpyxl/folium
+    import cost once instead of N times.
+    """
+    ctx = _mp_context()
+    for iata in iatas:
+        p = ctx.Process(target=run_one, args=(iata, gh_owner, gh_repo, workflow_file))
+        p.start()
+        p.join()
+        if p.exitcode != 0:
+            raise RuntimeError(f"Build for {iata} failed (exit code {p.exitcode})")
 
 def main():
     ap = argparse.ArgumentParser(
@@ -357,7 +699,8 @@ def main():
     ap.add_argument(
         "--iata",
         required=True,
-        help="Target airport IATA code (e.g., LAX)",
+        type=str.upper,
+        help="Target airport IATA code (e.g., LAX); comma-separated for a batch (LAX,JFK)",
     )
     ap.add_argument(
         "--gh-owner",
@@ -378,100 +721,11 @@ def main():
     )
     args = ap.parse_args()
 
-    iata = args.iata.upper()
-
-    os.makedirs(DOCS_DIR, exist_ok=True)
-    os.makedirs(RUNS_DIR, exist_ok=True)
-    os.makedirs(LIVE_DIR, exist_ok=True)
-
-    # Optional: mark "running" for live UI polling
-    try:
-        _write_live_status({"ok": False, "iata": iata, "status": "running", "ts": int(time.time())})
-    except Exception:
-        pass
-
-    # 1) Grid (throughput-only similarity)
-    grid_out_path = os.path.join(DOCS_DIR, "grid.html")
-    grid_res = build_grid(EXCEL_PATH, iata, out_html=grid_out_path)
-    grid_html = grid_res["html"]
-
-    # 2) ACA table (auto-discovers competitors from docs/grid.html)
-    aca_html, _aca_df = build_aca_table_html(iata)
-    with open(os.path.join(DOCS_DIR, "aca_table.html"), "w", encoding="utf-8") as f:
-        f.write(aca_html)
-
-    # 3) Map (highlight grid competitors)
-    highlight = set(grid_res.get("union", []))
-    fmap = build_map(target_iata=iata, highlight_iatas=highlight)
-    fmap.save(os.path.join(DOCS_DIR, "aca_map.html"))
-
-    # 4) Dashboard
-    actions_url = (
-        f"https://github.com/{args.gh_owner}/{args.gh_repo}"
-        f"/actions/workflows/{args.workflow_file}"
-    )
-    dash_html = (
-        DASHBOARD_TEMPLATE
-        .replace("__TITLE__", f"{iata} — Grid + ACA + Map")
-        .replace("__GRID__", "grid.html")
-        .replace("__ACA__", "aca_table.html")
-        .replace("__MAP__", "aca_map.html")
-        .replace("__IATA__", iata)
-        .replace("__ACTIONS_URL__", actions_url)
-    )
-    with open(os.path.join(DOCS_DIR, "index.html"), "w", encoding="utf-8") as f:
-        f.write(dash_html)
-
-    # 4.5) Stable live outputs for an in-page run experience
-    with open(os.path.join(LIVE_DIR, "grid.html"), "w", encoding="utf-8") as f:
-        f.write(grid_html)
-    with open(os.path.join(LIVE_DIR, "aca_table.html"), "w", encoding="utf-8") as f:
-        f.write(aca_html)
-    fmap.save(os.path.join(LIVE_DIR, "aca_map.html"))
-
-    # 5) Snapshot + manifest
-    ts = int(time.time())
-    run_dir = f"{RUNS_DIR}/{iata}-{ts}"
-    os.makedirs(run_dir, exist_ok=True)
-
-    with open(os.path.join(run_dir, "grid.html"), "w", encoding="utf-8") as f:
-        f.write(grid_html)
-    with open(os.path.join(run_dir, "aca_table.html"), "w", encoding="utf-8") as f:
-        f.write(aca_html)
-    fmap.save(os.path.join(run_dir, "aca_map.html"))
-
-    manifest = _load_manifest()
-    manifest.setdefault("runs", [])
-    manifest["runs"].append(
-        {
-            "ts": ts,
-            "iata": iata,
-            "path": f"runs/{iata}-{ts}",
-        }
-    )
-    # Keep only the most recent 100
-    manifest["runs"] = manifest["runs"][-100:]
-    _save_manifest(manifest)
-
-    # Mark live as complete (for polling)
-    try:
-        _write_live_status({"ok": True, "iata": iata, "status": "complete", "ts": ts})
-    except Exception:
-        pass
-
-    print("Wrote:")
-    print("  docs/grid.html")
-    print("  docs/aca_table.html")
-    print("  docs/aca_map.html")
-    print("  docs/index.html")
-    print("  docs/live/grid.html")
-    print("  docs/live/aca_table.html")
-    print("  docs/live/aca_map.html")
-    print("  docs/live/status.json")
-    print(f"  {run_dir}/grid.html")
-    print(f"  {run_dir}/aca_table.html")
-    print(f"  {run_dir}/aca_map.html")
-    print("Updated manifest:", MANIFEST)
+    iatas = [c.strip() for c in args.iata.split(",") if c.strip()]
+    if len(iatas) == 1:
+        run_one(iatas[0], args.gh_owner, args.gh_repo, args.workflow_file)
+    else:
+        run_many(iatas, args.gh_owner, args.gh_repo, args.workflow_file)
 
 if __name__ == "__main__":
     main()